@@ -1,45 +1,58 @@
 # SPDX-License-Identifier: MIT
 
-from __future__ import print_function
-
-import compileall
-import configparser
-import fileinput
+import ast
+import concurrent.futures
+import hashlib
+import importlib.util
+import json
 import logging
+import marshal
 import os
-import pickle
-import platform
-import py_compile
 import re
 import shutil
+import stat
+import struct
 import sys
 import sysconfig
+import threading
 import warnings
-import zipfile
 
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import install._fastzip as _fastzip
 import install._vendor as _vendor  # noqa: F401
 
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+
 '''
 python-install - A simple, correct PEP427 wheel installer
 '''
 __version__ = '0.0.3'
 
 
-if sys.version_info >= (3, 5) or (sys.version_info < (3,) and sys.version_info >= (2, 7)):
-    from typing import Any, Dict, List
+# isort:maintain_block
+if False:  # TYPE_CHECKING
+    # only needed by build(), imported there so that install() doesn't pay for them
+    import zipfile
 
-if sys.version_info < (3,):
-    FileNotFoundError = IOError
-    PermissionError = OSError
-    FileExistsError = OSError
+    from importlib import metadata as importlib_metadata
+
+    import packaging.requirements
+    import packaging.specifiers
+# isort:end_maintain_block
 
 
 _SUPPORTED_WHEEL_VERSION = (1, 0)
 
-_WHEEL_NAME_REGEX = re.compile(r'(?P<distribution>.+)-(?P<version>.+)'
-                               r'(-(?P<build_tag>.+))?-(?P<python_tag>.+)'
-                               r'-(?P<abi_tag>.+)-(?P<platform_tag>.+).whl')
+_FICLONE = 0x40049409  # _IOW(0x94, 9, int), see ioctl_ficlone(2)
+
+# PEP 427 escapes the wheel file name components down to ASCII, so \w doesn't need the unicode tables
+_WHEEL_NAME_COMPONENT_REGEX = re.compile(r'[\w.+!]+\Z', re.ASCII)
 
 logger = logging.getLogger('install')
 
@@ -59,86 +72,487 @@ class InstallException(Exception):
     pass
 
 
+_SYSCONFIG_PATHS = {}  # type: Dict[str, str]
+
+
+def _sysconfig_path(lib):  # type: (str) -> str
+    if lib not in _SYSCONFIG_PATHS:
+        _SYSCONFIG_PATHS[lib] = sysconfig.get_path(lib)
+    return _SYSCONFIG_PATHS[lib]
+
+
 def _destdir_path(destdir, lib):  # type: (str, str) -> str
-    path = sysconfig.get_path(lib)
+    path = _sysconfig_path(lib)
     if not path:
         raise InstallException("Couldn't find {}".format(lib))
     return os.path.join(destdir, os.sep.join(path.split(os.sep)[1:]))
 
 
-def _read_wheel_metadata(dist_info_path):  # type: (str) -> Dict[str, str]
-    metadata = {}
-    with open(os.path.join(dist_info_path, 'WHEEL')) as f:
-        for line in f:
-            entry = line.split(':')
-            if len(entry) == 2:  # throw error?
-                metadata[entry[0].strip()] = entry[1].strip()
+def _read_wheel_metadata(wheel_zip, dist_info_name):  # type: (zipfile.ZipFile, str) -> Dict[str, str]
+    try:
+        content = wheel_zip.read(dist_info_name + '/WHEEL').decode('utf-8')
+    except KeyError:
+        raise InstallException('Missing {}/WHEEL'.format(dist_info_name))
+
+    # RFC 822 headers, like email.parser would read them, without importing it
+    metadata = {}  # type: Dict[str, str]
+    key = None
+    for line in content.splitlines():
+        if not line.strip():  # end of the headers
+            break
+        if line[0] in ' \t' and key:  # continuation line
+            metadata[key] += ' ' + line.strip()
+            continue
+        key, sep, value = line.partition(':')
+        key = key.strip()
+        if sep:  # throw error?
+            metadata[key] = value.strip()
+        else:
+            key = None
     return metadata
 
 
-if sys.version_info >= (3, 8):
+def _open_wheel(wheel):  # type: (Union[str, IO[bytes]]) -> zipfile.ZipFile
+    import zipfile  # noqa: F811 # the module level import is only seen by the type checker
 
-    def _copy_dir(src, dst, ignore=[]):  # type: (str, str, List[str]) -> None
-        shutil.copytree(src, dst, dirs_exist_ok=True, ignore=lambda *_: ignore)
+    return zipfile.ZipFile(wheel)
 
-else:
 
-    def _copy_dir(src, dst, ignore=[]):  # type: (str, str, List[str]) -> None
-        from distutils.dir_util import copy_tree
-        for node in os.listdir(src):
-            if node in ignore:
-                continue
-            path = os.path.join(src, node)
-            root = os.path.join(dst, node)
-            if os.path.isdir(path):
-                copy_tree(path, root)
+def _member_path(dir, info):  # type: (str, zipfile.ZipInfo) -> str
+    # same sanitization as ZipFile.extract
+    arcname = os.path.splitdrive(info.filename.replace('/', os.sep))[1]
+    arcname = os.sep.join(part for part in arcname.split(os.sep) if part not in ('', os.curdir, os.pardir))
+    return os.path.normpath(os.path.join(dir, arcname))
+
+
+def _extract_member(wheel_zip, info, dir, created=None):
+    # type: (zipfile.ZipFile, zipfile.ZipInfo, str, Optional[Set[str]]) -> str
+    '''
+    ZipFile.extract replacement, tuned for the small files wheels are mostly made of
+
+    created is the set of directories known to exist, the ones in it are not created again.
+    '''
+    target = _member_path(dir, info)
+    is_dir = info.filename.endswith('/')
+    parent = target if is_dir else os.path.dirname(target)
+    if created is None or parent not in created:
+        os.makedirs(parent, exist_ok=True)
+        if created is not None:
+            created.add(parent)
+    if is_dir:
+        return target
+
+    fp = wheel_zip.fp
+    with open(target, 'wb') as f:
+        if not info.file_size:  # eg. __init__.py, nothing to decompress
+            pass
+        elif fp and _fastzip.supported(info):
+            try:
+                f.write(_fastzip.read(fp, info))
+            except ValueError as e:
+                raise InstallException('{}: {}'.format(e, info.filename))
+        else:
+            with wheel_zip.open(info) as member:
+                shutil.copyfileobj(member, f, min(info.file_size, 1 << 20))  # most members fit in a single read
+    return target
+
+
+def _extract_members(wheel_zip, infos, dir, wheel_path=None):
+    # type: (zipfile.ZipFile, List[zipfile.ZipInfo], str, Optional[str]) -> None
+    '''
+    Extracts infos from wheel_zip, spread between threads
+
+    zlib releases the GIL while inflating, so the members are decompressed in parallel.
+    Each thread opens its own handle on wheel_path, without it everything is extracted through wheel_zip.
+    '''
+    # create the directories upfront, so that the threads don't race on them
+    dirs = set()  # type: Set[str]
+    files = []
+    for info in infos:
+        if info.filename.endswith('/'):
+            dirs.add(_member_path(dir, info))
+        else:
+            dirs.add(os.path.dirname(_member_path(dir, info)))
+            files.append(info)
+    for path in sorted(dirs):
+        os.makedirs(path, exist_ok=True)
+
+    workers = min(len(files), os.cpu_count() or 1)
+    if workers <= 1 or wheel_path is None:
+        for info in files:
+            _extract_member(wheel_zip, info, dir, dirs)
+        return
+
+    # a ZipFile can't be shared between threads, each gets its own
+    local = threading.local()
+    handles = []  # type: List[zipfile.ZipFile]
+
+    def extract(info):  # type: (zipfile.ZipInfo) -> None
+        if not hasattr(local, 'wheel_zip'):
+            local.wheel_zip = _open_wheel(wheel_path)
+            handles.append(local.wheel_zip)
+        _extract_member(local.wheel_zip, info, dir, dirs)
+
+    # one task per member keeps the threads busy until the end, biggest first so that they don't come in last
+    files.sort(key=lambda info: info.compress_size, reverse=True)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(extract, files))
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def _ficlone(fsrc, fdst):  # type: (int, int) -> None
+    fcntl.ioctl(fdst, _FICLONE, fsrc)  # CoW clone (btrfs, XFS, ...)
+
+
+def _copy_file_range(fsrc, fdst):  # type: (int, int) -> None
+    size = os.fstat(fsrc).st_size
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(fsrc, fdst, size - copied)
+        if not n:  # some filesystems give up silently, don't take it for the end of the file
+            raise OSError('copy_file_range stopped after {} of {} bytes'.format(copied, size))
+        copied += n
+
+
+def _sendfile(fsrc, fdst):  # type: (int, int) -> None
+    size = os.fstat(fsrc).st_size
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(fdst, fsrc, offset, size - offset)
+        if not sent:
+            raise OSError('sendfile stopped after {} of {} bytes'.format(offset, size))
+        offset += sent
+
+
+_COPY_METHODS = [
+    method for available, method in (
+        (fcntl is not None and sys.platform.startswith('linux'), _ficlone),  # the ioctl number is Linux specific
+        (hasattr(os, 'copy_file_range'), _copy_file_range),  # Linux
+        (hasattr(os, 'sendfile'), _sendfile),
+    ) if available
+]
+
+
+def _copy_file_data(fsrc, fdst):  # type: (int, int) -> bool
+    '''
+    Copies the file contents without passing them through userspace, if possible
+    '''
+    for method in _COPY_METHODS:
+        try:
+            method(fsrc, fdst)
+            return True
+        except OSError:
+            # the kernel/filesystem can't do it (eg. macOS only supports sendfile to sockets), start over with the next one
+            os.lseek(fsrc, 0, os.SEEK_SET)
+            os.lseek(fdst, 0, os.SEEK_SET)
+    return False
+
+
+_FD_METADATA = os.utime in os.supports_fd and hasattr(os, 'fchmod')
+
+
+def _copy_file(src, dst):  # type: (str, str) -> None
+    if dst.endswith('.pyc'):
+        # bytecode already there may be hard linked to the bytecode cache, writing into it would change the cache entry
+        try:
+            os.unlink(dst)
+        except FileNotFoundError:
+            pass
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if not _copy_file_data(fsrc.fileno(), fdst.fileno()):
+            shutil.copyfileobj(fsrc, fdst, 1 << 20)
+        if _FD_METADATA:
+            # shutil.copystat without the path lookups and the extended attributes, which a wheel can't carry anyway
+            fdst.flush()
+            st = os.fstat(fsrc.fileno())
+            os.fchmod(fdst.fileno(), stat.S_IMODE(st.st_mode))
+            os.utime(fdst.fileno(), ns=(st.st_atime_ns, st.st_mtime_ns))
+    if not _FD_METADATA:
+        shutil.copystat(src, dst)
+
+
+def _copy_tree(src, dst, copied):  # type: (str, str, List[str]) -> None
+    '''
+    Copies the src tree to dst, appending the destination path of every file copied to copied
+    '''
+    os.makedirs(dst, exist_ok=True)
+    prefix = os.path.join(dst, '')
+    with os.scandir(src) as it:
+        for entry in it:
+            if entry.is_dir():
+                _copy_tree(entry.path, prefix + entry.name, copied)
             else:
-                shutil.copy2(path, root)
+                _copy_file(entry.path, prefix + entry.name)
+                copied.append(prefix + entry.name)
+    shutil.copystat(src, dst)
+
+
+def _copy_node(src, dst, is_dir):  # type: (str, str, bool) -> List[str]
+    '''
+    Returns the destination path of every file copied, so that the tree doesn't need to be walked again
+    '''
+    if not is_dir:
+        _copy_file(src, dst)
+        return [dst]
+    copied = []  # type: List[str]
+    _copy_tree(src, dst, copied)
+    return copied
+
+
+def _scandir(path):  # type: (str) -> List[os.DirEntry[str]]
+    with os.scandir(path) as it:
+        return list(it)
+
+
+def _copy_dirs(plan):  # type: (List[Tuple[str, List[os.DirEntry[str]]]]) -> Iterator[Tuple[str, str]]
+    '''
+    Copies each (dst, entries) pair, entries being the directory entries to copy into dst, concurrently
+
+    The copies are split by top-level node, so that big trees are spread between threads.
+    Yields (dst, path) for every file copied as soon as its node is done, so that the caller
+    can process it while the rest is still being copied. Nothing is copied until iterated.
+    '''
+    jobs = []
+    for dst, entries in plan:
+        os.makedirs(dst, exist_ok=True)
+        prefix = os.path.join(dst, '')
+        jobs += [(entry.path, prefix + entry.name, entry.is_dir(), dst) for entry in entries]
+
+    # file copies are I/O bound and release the GIL
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        futures = {executor.submit(_copy_node, *job[:3]): job[3] for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            for path in future.result():
+                yield futures[future], path
+
+
+def _bytecode_paths(path, optimize):  # type: (str, List[int]) -> Dict[int, str]
+    '''
+    Returns the bytecode path of every optimization level, creating their directories
+    '''
+    cfiles = {level: importlib.util.cache_from_source(path, optimization=level or '') for level in optimize}
+    for dir in set(map(os.path.dirname, cfiles.values())):
+        os.makedirs(dir, exist_ok=True)
+    return cfiles
+
+
+def _replace_with_link(src, dst):  # type: (str, str) -> None
+    tmp = '{}.{}.tmp'.format(dst, os.getpid())
+    try:
+        os.link(src, tmp)
+    except OSError:  # eg. the cache is in another filesystem
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _link_cached(cached, cfile):  # type: (str, str) -> bool
+    '''
+    Puts the cached bytecode in cfile, returns False if it is not in the cache
+    '''
+    try:
+        st = os.stat(cached)
+        try:
+            if os.path.samestat(st, os.stat(cfile)):
+                return True  # already linked, rename() would do nothing and leave the temporary file behind
+        except FileNotFoundError:
+            pass
+        _replace_with_link(cached, cfile)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _write_atomic(path, data, cached=None):  # type: (str, bytes, Optional[str]) -> None
+    '''
+    Like py_compile, replaces the file instead of writing into it, as it may be hard linked to the bytecode cache
+
+    If cached is given, the file is added to the bytecode cache there.
+    '''
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    if cached:
+        _link_cached(path, cached)
+
+
+def _cached_paths(cache, dfile, source, optimize):  # type: (str, str, bytes, List[int]) -> Dict[int, str]
+    '''
+    Returns the bytecode cache path of every optimization level
+
+    The key covers everything that ends up in the bytecode: the interpreter, the recorded path and the source.
+    '''
+    key = hashlib.sha256(importlib.util.MAGIC_NUMBER + os.fsencode(dfile) + b'\0' + source).hexdigest()
+    os.makedirs(os.path.join(cache, key[:2]), exist_ok=True)
+    return {level: os.path.join(cache, key[:2], '{}.{}.pyc'.format(key[2:], level)) for level in optimize}
+
+
+def _compile_file(job):  # type: (Tuple[str, str, List[int], Optional[str]]) -> Optional[str]
+    '''
+    Writes checked hash based bytecode (PEP 552) for every optimization level, parsing the source only once
+
+    With a bytecode cache, the levels found there are linked instead, only the rest are compiled and added to it.
+    '''
+    path, dfile, optimize, cache = job
+    with open(path, 'rb') as f:
+        source = f.read()
+    cfiles = _bytecode_paths(path, optimize)
+    cached = _cached_paths(cache, dfile, source, optimize) if cache else {}
+    optimize = [level for level in optimize if not (cached and _link_cached(cached[level], cfiles[level]))]
+    if not optimize:
+        return None
+
+    try:
+        tree = ast.parse(source, dfile)
+        codes = [(level, compile(tree, dfile, 'exec', dont_inherit=True, optimize=level)) for level in optimize]
+    except (SyntaxError, ValueError) as e:
+        return 'Failed to compile {}: {}'.format(dfile, e)
+
+    header = importlib.util.MAGIC_NUMBER + struct.pack('<I', 0b11) + importlib.util.source_hash(source)
+    for level, code in codes:
+        _write_atomic(cfiles[level], header + marshal.dumps(code), cached.get(level))
+    return None
+
+
+_COMPILE_CHUNKSIZE = 4
+
+
+def _count_sources(entries, limit):  # type: (Iterable[os.DirEntry[str]], int) -> int
+    '''
+    Counts the Python files in entries and the trees under them, stops counting at limit
+    '''
+    count = 0
+    stack = list(entries)
+    while stack and count < limit:
+        entry = stack.pop()
+        if entry.is_dir():
+            stack += _scandir(entry.path)
+        elif entry.name.endswith('.py'):
+            count += 1
+    return count
+
+
+def _compile(files, optimize, destdir, cache=None, sources=None):
+    # type: (Iterable[str], List[int], str, Optional[str], Optional[int]) -> None
+    '''
+    Byte-compiles the Python files in files, for all the optimization levels at once, as they are produced
+
+    The files live in destdir, the path recorded in the bytecode is their final one, without destdir.
+    files is always consumed entirely, even if there is nothing to compile.
+    cache is the bytecode cache directory, if any.
+    sources is the number of Python files in files, or a lower bound of at least cpus * _COMPILE_CHUNKSIZE,
+    the worker pool is sized after it.
+    '''
+    jobs = (
+        (path, os.path.join(os.sep, os.path.relpath(path, destdir)), optimize, cache)
+        for path in files if path.endswith('.py')
+    )
+
+    workers = os.cpu_count() or 1
+    if sources is not None:
+        # every worker takes at least a chunk, more would only be forked to sit idle
+        workers = min(workers, -(-sources // _COMPILE_CHUNKSIZE))
+    errors = None  # type: Optional[List[Optional[str]]]
+    if workers > 1 and optimize:
+        try:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        except (ImportError, NotImplementedError) as e:  # no working multiprocessing on this platform
+            logger.debug('Falling back to serial bytecode compilation: {}'.format(e))
+        else:
+            with executor:
+                # start the workers now, files may come from other threads and forking those is unsafe
+                executor.submit(int).result()
+                # the jobs are submitted as they are generated, small chunks get the workers going early
+                errors = list(executor.map(_compile_file, jobs, chunksize=_COMPILE_CHUNKSIZE))
+    if errors is None:
+        errors = [_compile_file(job) for job in jobs]
+
+    for error in errors:
+        if error:
+            warnings.warn(error, InstallWarning)
+
+
+def _write_files(files):  # type: (Dict[str, bytes]) -> None
+    def write(item):  # type: (Tuple[str, bytes]) -> None
+        with open(item[0], 'wb') as f:
+            f.write(item[1])
+
+    if not files:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(files))) as executor:
+        list(executor.map(write, files.items()))
+
+
+def _read_entrypoints(file, group):  # type: (str, str) -> Dict[str, str]
+    '''
+    Minimal entry_points.txt parser, returns the 'name = value' lines of the group section, the rest is skipped
+    '''
+    entrypoints = {}  # type: Dict[str, str]
+    in_group = False
+    with open(file) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(('#', ';')):
+                continue
+            if line.startswith('[') and line.endswith(']'):
+                in_group = line[1:-1].strip() == group
+            elif in_group:
+                name, sep, value = line.partition('=')
+                if sep:
+                    entrypoints[name.strip()] = value.strip()
+    return entrypoints
 
 
 def _generate_entrypoint_scripts(file, dir):  # type: (str, str) -> None
-    entrypoints = configparser.ConfigParser()
-    entrypoints.read(file)
-    if 'console_scripts' in entrypoints:
-        if not os.path.exists(dir):
-            os.mkdir(dir)
+    entrypoints = _read_entrypoints(file, 'console_scripts')
+    if entrypoints:
+        os.makedirs(dir, exist_ok=True)
 
         import installer.scripts
 
-        for name, backend in entrypoints['console_scripts'].items():
+        scripts = {}
+        for name, backend in entrypoints.items():
             package, call = backend.split(':')
 
             script = installer.scripts.Script(name, package, call, section='console')
             name, data = script.generate(sys.executable, kind='posix')
+            scripts[os.path.join(dir, name)] = data
 
-            with open(os.path.join(dir, name), 'wb') as f:
-                f.write(data)
+        _write_files(scripts)
 
 
 def _replace_shebang(dir, interpreter):  # type: (str, str) -> None
-    scripts = [os.path.join(dir, script) for script in os.listdir(dir)]
-
-    for script in scripts:
-        if not os.path.isfile(script):
-            raise InstallException('Script is not a file: {}'.format(script))
-
-    # Python 2 does not support fileinput as a contex manager
-    f = fileinput.input(scripts, inplace=True)
-    for line in f:
-        if f.isfirstline():
-            line = re.sub(r'^#!python', '#!{}'.format(interpreter), line)
-        print(line, end='')
-    f.close()
+    shebang = os.fsencode(interpreter)
+    with os.scandir(dir) as it:
+        for entry in it:
+            if not entry.is_file():
+                raise InstallException('Script is not a file: {}'.format(entry.path))
+            with open(entry.path, 'rb') as f:
+                data = f.read()
+            if data.startswith(b'#!python'):
+                # rewrite in place, the file keeps its inode and mode
+                with open(entry.path, 'wb') as f:
+                    f.write(b'#!' + shebang + data[len(b'#!python'):])
+
+
+def _import_dependency_checking():  # type: () -> Optional[ImportError]
+    '''
+    Imports the dependency-checking extra, which takes longer to import than everything else in this module
+    '''
+    global packaging, importlib_metadata
+    try:
+        import packaging.requirements
+        import packaging.specifiers
+    except ImportError as e:
+        return e
+    from importlib import metadata as importlib_metadata
+    return None
 
 
 def _check_requirement(requirement_string):  # type: (str) -> bool
-    import packaging.requirements
-
-    if sys.version_info >= (3, 8):
-        from importlib import metadata as importlib_metadata
-    else:
-        import importlib_metadata
-
     req = packaging.requirements.Requirement(requirement_string)
 
     if req.marker and not req.marker.evaluate():
@@ -162,79 +576,106 @@ def _check_requirement(requirement_string):  # type: (str) -> bool
 
 
 def _verify_compability(dir, verify_dependencies=False):  # type: (str, bool) -> None
-    try:
-        import packaging.specifiers
-
-        if sys.version_info >= (3, 8):
-            from importlib import metadata as importlib_metadata
-        else:
-            import importlib_metadata
-
-        dist = importlib_metadata.Distribution.at(dir)
-
-        py_ver = dist.metadata['Requires-Python']
-        if py_ver:
-            py_vers = py_ver.split(',')
-            for ver in py_vers:
-                py_spec = packaging.specifiers.Specifier(ver)
-                if platform.python_version() not in py_spec:
-                    raise InstallException('Incompatible python version, needed: {}'.format(py_ver))
-
-        if verify_dependencies:
-            for req in dist.metadata.get_all('Requires-Dist') or []:
-                if not _check_requirement(req):
-                    raise InstallException('Missing dependency: {}'.format(req))
-
-    except ImportError as e:
-        warnings.warn('{}: Platform/Python tags were not verified for compatibility'.format(e), InstallWarning)
-
-
-def _save_pickle(dir, name, data):  # type: (str, str, Any) -> None
-    with open(os.path.join(dir, name + '.pickle'), 'wb') as f:
-        pickle.dump(data, f)
-
-
-def _load_pickle(dir, name):  # type: (str, str) -> Any
-    with open(os.path.join(dir, name + '.pickle'), 'rb') as f:
-        return pickle.load(f)
+    error = _import_dependency_checking()
+    if error:
+        warnings.warn('{}: Platform/Python tags were not verified for compatibility'.format(error), InstallWarning)
+        return
+
+    # Distribution.metadata reads and parses METADATA again on every access
+    metadata = importlib_metadata.Distribution.at(dir).metadata
+
+    py_ver = metadata['Requires-Python']
+    # as pip does, the release only, so that pre-release interpreters aren't rejected
+    if py_ver and '{}.{}.{}'.format(*sys.version_info[:3]) not in packaging.specifiers.SpecifierSet(py_ver):
+        raise InstallException('Incompatible python version, needed: {}'.format(py_ver))
+
+    if verify_dependencies:
+        for req in metadata.get_all('Requires-Dist') or []:
+            if not _check_requirement(req):
+                raise InstallException('Missing dependency: {}'.format(req))
+
+
+def _save_state(dir, wheel_info, metadata):  # type: (str, Dict[str, Any], Dict[str, str]) -> None
+    # json.dumps uses the C encoder and results in a single write, json.dump does neither
+    data = json.dumps({'wheel_info': wheel_info, 'metadata': metadata}, separators=(',', ':'))
+    with open(os.path.join(dir, 'state.json'), 'w') as f:
+        f.write(data)
+
+
+def _load_state(dir):  # type: (str) -> Tuple[Dict[str, Any], Dict[str, str]]
+    with open(os.path.join(dir, 'state.json')) as f:
+        state = json.load(f)
+    return state['wheel_info'], state['metadata']
+
+
+def parse_name(name):  # type: (str) -> Dict[str, Optional[str]]
+    # {distribution}-{version}(-{build tag})?-{python tag}-{abi tag}-{platform tag}.whl
+    # '-' can't appear inside the components, so splitting on it is unambiguous
+    # at most 6 splits, anything past the 6th component is rejected without splitting the rest of the name
+    parts = name[:-4].split('-', 6)
+    if (
+        not name.endswith('.whl')
+        or len(parts) not in (5, 6)
+        or not all(map(_WHEEL_NAME_COMPONENT_REGEX.match, parts))
+        or (len(parts) == 6 and not parts[2][0].isdigit())  # the build tag must start with a digit
+    ):
+        raise InstallException('Invalid wheel name: {}'.format(name))
 
+    build_tag = parts.pop(2) if len(parts) == 6 else None
+    distribution, version, python_tag, abi_tag, platform_tag = parts
+    return {
+        'distribution': distribution,
+        'version': version,
+        'build_tag': build_tag,
+        'python_tag': python_tag,
+        'abi_tag': abi_tag,
+        'platform_tag': platform_tag,
+    }
 
-def parse_name(name):  # type: (str) -> Dict[str, str]
-    match = _WHEEL_NAME_REGEX.match(name)
-    if not match:
-        raise InstallException('Invalid wheel name: {}'.format(name))
-    return match.groupdict()
 
+def build(wheel, cache_dir, optimize=None, verify_dependencies=False, wheel_name=None):
+    # type: (Union[str, IO[bytes]], str, Optional[List[int]], bool, Optional[str]) -> Tuple[Dict[str, Any], Dict[str, str]]
+    '''
+    wheel is a path or a seekable binary file object (eg. io.BytesIO with a downloaded wheel), which is
+    read directly, without a temporary file on disk. File objects need wheel_name, the wheel file name.
+    optimize is deprecated and ignored, the bytecode is compiled by install().
+    '''
+    if optimize is not None:
+        warnings.warn('build() no longer byte-compiles, pass optimize to install() instead', DeprecationWarning, stacklevel=2)
+    if wheel_name is None:
+        if not isinstance(wheel, str):
+            raise InstallException('Missing wheel name, required when installing from a file object')
+        wheel_name = os.path.basename(wheel)
 
-def build(wheel, cache_dir, optimize=[0, 1, 2], verify_dependencies=False):  # type: (str, str, List[int], bool) -> None
     pkg_cache_dir = os.path.join(cache_dir, 'pkg')
     scripts_cache_dir = os.path.join(cache_dir, 'scripts')
-    wheel_info = parse_name(os.path.basename(wheel))
+    wheel_info = parse_name(wheel_name)
     package = '{}-{}'.format(wheel_info['distribution'], wheel_info['version'])
     dist_info = os.path.join(pkg_cache_dir, '{}.dist-info'.format(package))
     entrypoints_file = os.path.join(dist_info, 'entry_points.txt')
     scripts_dir = os.path.join(pkg_cache_dir, '{}.data'.format(package), 'scripts')
 
-    with zipfile.ZipFile(wheel) as wheel_zip:
-        wheel_zip.extractall(pkg_cache_dir)
+    dist_info_prefix = '{}.dist-info/'.format(package)
 
-    metadata = _read_wheel_metadata(dist_info)
+    with _open_wheel(wheel) as wheel_zip:
+        # read WHEEL straight from the archive, so that unsupported wheels are rejected before extracting anything
+        metadata = _read_wheel_metadata(wheel_zip, '{}.dist-info'.format(package))
 
-    if tuple(map(int, metadata['Wheel-Version'].split('.'))) > _SUPPORTED_WHEEL_VERSION:
-        raise InstallException('Unsupported wheel version: {}'.format(metadata['Wheel-Version']))
+        if tuple(map(int, metadata['Wheel-Version'].split('.'))) > _SUPPORTED_WHEEL_VERSION:
+            raise InstallException('Unsupported wheel version: {}'.format(metadata['Wheel-Version']))
 
-    _verify_compability(dist_info, verify_dependencies)
-
-    if sys.version_info >= (3,):
-        for level in optimize:
-            logger.debug('Optimizing for {}'.format(level))
-            if sys.version_info >= (3, 7):
-                compileall.compile_dir(pkg_cache_dir, optimize=level,
-                                       invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH)
+        # extract the metadata first, so that the wheel is validated before doing the heavy work
+        members = []
+        created = set()  # type: Set[str]
+        for info in wheel_zip.infolist():
+            if info.filename.startswith(dist_info_prefix):
+                _extract_member(wheel_zip, info, pkg_cache_dir, created)
             else:
-                compileall.compile_dir(pkg_cache_dir, optimize=level)
-    elif optimize:
-        compileall.compile_dir(pkg_cache_dir)
+                members.append(info)
+
+        _verify_compability(dist_info, verify_dependencies)
+
+        _extract_members(wheel_zip, members, pkg_cache_dir, wheel if isinstance(wheel, str) else None)
 
     if os.path.isfile(entrypoints_file):
         _generate_entrypoint_scripts(entrypoints_file, scripts_cache_dir)
@@ -242,44 +683,58 @@ def build(wheel, cache_dir, optimize=[0, 1, 2], verify_dependencies=False):  # t
     if os.path.isdir(scripts_dir):
         _replace_shebang(scripts_dir, sys.executable)
 
-    _save_pickle(cache_dir, 'wheel-info', wheel_info)
-    _save_pickle(cache_dir, 'metadata', metadata)
+    _save_state(cache_dir, wheel_info, metadata)
 
     # TODO: verify checksums
 
+    return wheel_info, metadata
 
-def install(cache_dir, destdir):  # type: (str, str) -> None
-    def destdir_path(lib):  # type: (str) -> str
-        return _destdir_path(destdir, lib)
 
-    wheel_info = _load_pickle(cache_dir, 'wheel-info')
-    metadata = _load_pickle(cache_dir, 'metadata')
+def install(cache_dir, destdir, optimize=[0, 1, 2], state=None, bytecode_cache=None):
+    # type: (str, str, List[int], Optional[Tuple[Dict[str, Any], Dict[str, str]]], Optional[str]) -> None
+    '''
+    state is the value returned by build(), when given the cache state file is not read
+    bytecode_cache is a directory shared between installations, the bytecode found there is hard linked
+    instead of compiled again
+    '''
+    wheel_info, metadata = state or _load_state(cache_dir)
 
     pkg_cache_dir = os.path.join(cache_dir, 'pkg')
     scripts_cache_dir = os.path.join(cache_dir, 'scripts')
     pkg_data_dir_name = '{}-{}.data'.format(wheel_info['distribution'], wheel_info['version'])
-    pkg_data_dir = os.path.join(cache_dir, pkg_data_dir_name)
+    pkg_data_dir = os.path.join(pkg_cache_dir, pkg_data_dir_name)
+
+    lib_dirs = {lib: _destdir_path(destdir, lib) for lib in ('purelib', 'platlib', 'scripts')}
+    pkg_dir = lib_dirs['purelib' if metadata['Root-Is-Purelib'] == 'true' else 'platlib']
 
-    pkg_dir = destdir_path('purelib' if metadata['Root-Is-Purelib'] == 'true' else 'platlib')
+    # the cache root is only listed once, the same entries are used to find the special folders and as copy plan
+    entries = _scandir(pkg_cache_dir)
+    present = {entry.name for entry in entries if entry.is_dir(follow_symlinks=False)}
 
-    _copy_dir(pkg_cache_dir, pkg_dir, ignore=['purelib', 'platlib', pkg_data_dir_name])
+    ignore = ('purelib', 'platlib', pkg_data_dir_name)
+    plan = [(pkg_dir, [entry for entry in entries if entry.name not in ignore])]
     for lib in ['purelib', 'platlib']:
-        target = os.path.join(pkg_cache_dir, lib)
-        if os.path.isdir(target):
-            _copy_dir(target, destdir_path(lib))
-    if os.path.isdir(pkg_data_dir):
-        for node in os.listdir(pkg_data_dir):
-            target = os.path.join(pkg_cache_dir, node)
-            if node == 'purelib':
-                _copy_dir(target, destdir_path('purelib'))
-            if node == 'platlib':
-                _copy_dir(target, destdir_path('platlib'))
-            if node == 'scripts':
-                _copy_dir(target, destdir_path('scripts'))
+        if lib in present:
+            plan.append((lib_dirs[lib], _scandir(os.path.join(pkg_cache_dir, lib))))
+    if pkg_data_dir_name in present:
+        for entry in _scandir(pkg_data_dir):
+            if entry.name in ('purelib', 'platlib', 'scripts') and entry.is_dir():
+                plan.append((lib_dirs[entry.name], _scandir(entry.path)))
             # TODO: headers, data -- is this a direct mapping to sysconfig? does it need specific path handling?
             else:
-                warnings.warn('Unhandled data folder: {}'.format(node), IncompleteInstallationWarning)
+                warnings.warn('Unhandled data folder: {}'.format(entry.name), IncompleteInstallationWarning)
 
     if os.path.isdir(scripts_cache_dir):
-        _copy_dir(scripts_cache_dir, destdir_path('scripts'))
+        plan.append((lib_dirs['scripts'], _scandir(scripts_cache_dir)))
+
+    # only as many as the worker pool can use, before copying, the pool is started before the copy threads
+    sources = _count_sources(
+        (entry for dst, entries in plan if dst != lib_dirs['scripts'] for entry in entries),
+        (os.cpu_count() or 1) * _COMPILE_CHUNKSIZE,
+    )
+
+    # byte-compile in place, as the files are copied, so that the bytecode never has to be copied around
+    copied = (path for dst, path in _copy_dirs(plan) if dst != lib_dirs['scripts'])
+    logger.debug('Optimizing for {}'.format(', '.join(map(str, optimize))))
+    _compile(copied, optimize, destdir, bytecode_cache, sources)
     # TODO: update dist-info/RECORD
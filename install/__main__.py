@@ -1,26 +1,18 @@
 # SPDX-License-Identifier: MIT
 
-from __future__ import print_function
-
 import argparse
 import logging
 import os
 import shutil
 import sys
+import threading
 import traceback
-import typing
 import warnings
 
-from typing import Optional, TextIO, Union
-
-
-# isort:maintain_block
-if False:  # TYPE_CHECKING
-    from typing import Type  # not in 3.5.{0,1}
-# isort:end_maintain_block
+from typing import Any, Callable, Optional, TextIO, Tuple, Type, Union
 
 
-from . import IncompleteInstallationWarning, InstallException, build, install  # isort:skip # until isort 5.0.0
+from . import IncompleteInstallationWarning, InstallException, InstallWarning, build, install  # isort:skip # until isort 5.0.0
 
 
 logger = logging.getLogger('install.main')
@@ -36,10 +28,7 @@ def _showwarning(message, category, filename, lineno, file=None, line=None):
         where = '\33[2m' + where + '\33[0m'
         name = '\33[33m\33[7m' + name + '\33[0m'
     if not file:
-        if sys.version_info >= (3,):
-            file = sys.stderr
-        else:
-            file = typing.cast(TextIO, sys.stderr)
+        file = sys.stderr
     print('{} {} {} {}'.format(prefix, where, name, message), file=file)
 
 
@@ -54,6 +43,11 @@ def _error(msg, code=1):  # type: (str, int) -> None
     exit(code)
 
 
+def _rmtree_error(function, path, excinfo):
+    # type: (Callable[..., Any], str, Tuple[Type[BaseException], BaseException, Any]) -> None
+    warnings.warn("Couldn't remove the old installation cache: {}".format(excinfo[1]), InstallWarning)
+
+
 if __name__ == '__main__':  # noqa: C901
     sys.argv[0] = 'python -m install'
     parser = argparse.ArgumentParser()
@@ -64,11 +58,14 @@ if __name__ == '__main__':  # noqa: C901
                         action='store_true',
                         help='enable verbose output')
     parser.add_argument('--optimize', '-o', nargs='*', metavar='level',
-                        type=int, default=[0, 1, 2],
+                        type=int,
                         help='optimization level(s) (default=0, 1, 2)')
     parser.add_argument('--destdir', '-d', metavar='/',
                         type=str, default='/',
                         help='destination directory')
+    parser.add_argument('--bytecode-cache', '-b', metavar='dir',
+                        type=str,
+                        help='reuse the bytecode compiled by previous installations, kept in this directory')
     parser.add_argument('--verify-dependencies', '-t',
                         action='store_true',
                         help='check if the dependencies are met')
@@ -101,31 +98,46 @@ if __name__ == '__main__':  # noqa: C901
     if not args.wheel and not args.skip_build:
         _error('Missing argument: wheel')
 
+    if args.optimize is None:
+        args.optimize = [0, 1, 2]
+    elif args.cache:
+        warnings.warn('--optimize has no effect with --cache, the bytecode is compiled when installing', InstallWarning)
+
+    cleanup = None  # type: Optional[threading.Thread]
     if os.path.exists(cache_dir):
         if os.path.isdir(cache_dir):
             if not args.skip_build:
                 logger.debug('Cache directory exists, removing')
-                shutil.rmtree(cache_dir)
+                # move it out of the way and delete it in the background, the build doesn't have to wait for it
+                trash = '{}.trash-{}'.format(cache_dir, os.urandom(4).hex())
+                os.rename(cache_dir, trash)
+                cleanup = threading.Thread(target=shutil.rmtree, args=(trash,), kwargs={'onerror': _rmtree_error})
+                cleanup.start()
         else:
             _error("The cache path ('{}') exists and it's not a directory".format(cache_dir))
 
     # Build cache
+    state = None
     if not args.skip_build:
         try:
-            build(args.wheel, cache_dir, args.optimize, args.verify_dependencies)
+            state = build(args.wheel, cache_dir, verify_dependencies=args.verify_dependencies)
         except InstallException as e:
             _error(str(e))
         except Exception as e:
             print(traceback.format_exc())
             _error(str(e))
 
+    # install() may fork the bytecode compile workers, forking with a live thread is unsafe
+    if cleanup:
+        cleanup.join()
+
     # Install to destination
     if not args.cache:
         if not os.path.isdir(cache_dir):
             _error('Missing installation cache (hint: python -m install --cache [ ... ])')
 
         try:
-            install(cache_dir, args.destdir)
+            install(cache_dir, args.destdir, args.optimize, state, args.bytecode_cache)
         except InstallException as e:
             _error(str(e))
         except Exception as e:
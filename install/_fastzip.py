@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: MIT
+
+'''
+Minimal read-only access to zip members, for the small files wheels are mostly made of
+
+zipfile.ZipFile.open stacks a locked shared file, a ZipExtFile and a buffered reader on top of every member,
+and checks the password and the local header name again. Here, a member is a single read of its compressed
+data, decompressed in one call into a buffer of the right size.
+'''
+
+import struct
+import zlib
+
+from typing import IO, Tuple, Type
+
+
+try:
+    from isal import isal_zlib  # SIMD accelerated DEFLATE
+except ImportError:
+    isal_zlib = None
+
+
+# isort:maintain_block
+if False:  # TYPE_CHECKING
+    import zipfile
+# isort:end_maintain_block
+
+
+_STORED = 0  # zipfile.ZIP_STORED
+_DEFLATED = 8  # zipfile.ZIP_DEFLATED
+
+_decompressobj = isal_zlib.decompressobj if isal_zlib else zlib.decompressobj
+_ERRORS = (zlib.error, isal_zlib.error) if isal_zlib else (zlib.error,)  # type: Tuple[Type[Exception], ...]
+
+# members are read into memory whole, bigger ones are left to zipfile, which streams them
+MAX_SIZE = 1 << 24
+
+
+def supported(info):  # type: (zipfile.ZipInfo) -> bool
+    return (
+        info.compress_type in (_STORED, _DEFLATED)
+        and not info.flag_bits & 0x1  # encrypted
+        and info.file_size <= MAX_SIZE
+        and info.compress_size <= MAX_SIZE
+    )
+
+
+def read(fp, info):  # type: (IO[bytes], zipfile.ZipInfo) -> bytes
+    '''
+    Returns the contents of a supported() member, raises ValueError if they are corrupted
+    '''
+    # skip the local file header, the sizes come from the central directory
+    fp.seek(info.header_offset)
+    header = fp.read(30)
+    if len(header) != 30 or header[:4] != b'PK\x03\x04':
+        raise ValueError('Bad local file header')
+    name_length, extra_length = struct.unpack('<HH', header[26:])
+    fp.seek(name_length + extra_length, 1)
+
+    data = fp.read(info.compress_size)
+    if info.compress_type == _DEFLATED:
+        # like ZipFile.open, never inflate past the declared size, one byte more is enough to detect a longer stream
+        decompressor = _decompressobj(-15)
+        try:
+            data = decompressor.decompress(data, info.file_size + 1)
+        except _ERRORS as e:
+            raise ValueError('Bad compressed data ({})'.format(e))
+        if not decompressor.eof:
+            raise ValueError('Bad compressed data (longer than the declared size, or incomplete)')
+    if len(data) != info.file_size or zlib.crc32(data) & 0xffffffff != info.CRC:
+        raise ValueError('Bad CRC-32')
+    return data